@@ -1,4 +1,5 @@
 import copy
+import functools
 import numbers
 import os.path
 import warnings
@@ -7,8 +8,8 @@ from collections import namedtuple
 import audioread
 import librosa
 import numpy as np
-import scipy.io.wavfile as wav
 import scipy
+import scipy.fft
 from scipy.signal import check_COLA
 import soundfile as sf
 import pyloudnorm
@@ -384,7 +385,8 @@ class AudioSignal(object):
             raise AudioSignalException('Not all values of audio_data are finite!')
 
         if value.ndim > 1 and value.shape[constants.CHAN_INDEX] > value.shape[constants.LEN_INDEX]:
-            value = value.T
+            # store channel-major so that every channel is a contiguous row
+            value = np.ascontiguousarray(value.T)
 
         if value.ndim > 2:
             raise AudioSignalException('self.audio_data cannot have more than 2 dimensions!')
@@ -505,7 +507,8 @@ class AudioSignal(object):
             window_type = constants.WINDOW_HANN
         else:
             window_type = self._stft_params.window_type
-        check_COLA(window_type, self._stft_params.window_length, self._stft_params.hop_length)
+        _check_cola_cached(
+            window_type, self._stft_params.window_length, self._stft_params.hop_length)
 
     @property
     def has_data(self):
@@ -784,27 +787,45 @@ class AudioSignal(object):
             assert duration >= 0, 'Parameter `duration` must be >= 0!'
 
         try:
-            # try reading headers with soundfile for speed
-            audio_info = sf.info(input_file_path)
-            file_length = audio_info.duration
+            # try opening with soundfile for speed; the header and the samples
+            # are then both read from this single open handle
+            sound_file = sf.SoundFile(input_file_path)
         except:
             # if that doesn't work try audioread
+            sound_file = None
             with audioread.audio_open(os.path.realpath(input_file_path)) as input_file:
                 file_length = input_file.duration
+        else:
+            file_length = sound_file.frames / sound_file.samplerate
 
-        if offset > file_length:
-            raise AudioSignalException('offset is longer than signal!')
-
-        if duration is not None and offset + duration >= file_length:
-            warnings.warn('offset + duration are longer than the signal.'
-                          ' Reading until end of signal...',
-                          UserWarning)
-
-        audio_input, self._sample_rate = librosa.load(input_file_path,
-                                                      sr=None,
-                                                      offset=offset,
-                                                      duration=duration,
-                                                      mono=False)
+        try:
+            if offset > file_length:
+                raise AudioSignalException('offset is longer than signal!')
+
+            if duration is not None and offset + duration >= file_length:
+                warnings.warn('offset + duration are longer than the signal.'
+                              ' Reading until end of signal...',
+                              UserWarning)
+
+            if sound_file is not None:
+                # libsndfile can decode this file, so read just the requested frames
+                # straight to float32 (offset and duration are rounded like librosa does)
+                self._sample_rate = sound_file.samplerate
+                frames = -1 if duration is None else int(duration * self._sample_rate)
+                sound_file.seek(int(offset * self._sample_rate))
+                audio_input = sound_file.read(frames=frames, dtype='float32', always_2d=True)
+                # soundfile returns interleaved (n_samples, n_channels) frames
+                audio_input = np.ascontiguousarray(audio_input.T)
+            else:
+                audio_input, self._sample_rate = librosa.load(input_file_path,
+                                                              sr=None,
+                                                              offset=offset,
+                                                              duration=duration,
+                                                              mono=False,
+                                                              dtype=np.float32)
+        finally:
+            if sound_file is not None:
+                sound_file.close()
 
         self.audio_data = audio_input
         self.original_signal_length = self.signal_length
@@ -840,9 +861,11 @@ class AudioSignal(object):
 
         self.path_to_input_file = None
 
-        # Change from fixed point to floating point
+        # Change from fixed point to floating point. float32 matches what is read from
+        # audio files and holds 16-bit samples exactly; scale in place to avoid a second copy.
         if not np.issubdtype(signal.dtype, np.floating):
-            signal = signal.astype('float') / (np.iinfo(np.dtype('int16')).max + 1.0)
+            signal = signal.astype(np.float32)
+            signal *= 1.0 / (np.iinfo(np.dtype('int16')).max + 1.0)
 
         self.audio_data = signal
         self.original_signal_length = self.signal_length
@@ -867,15 +890,10 @@ class AudioSignal(object):
         if sample_rate is None:
             sample_rate = self.sample_rate
 
-        audio_output = np.copy(self.audio_data)
-
-        # TODO: better fix
-        # convert to fixed point again
-        if not np.issubdtype(audio_output.dtype, np.dtype(int).type):
-            audio_output = np.multiply(
-                audio_output,
-                2 ** (constants.DEFAULT_BIT_DEPTH - 1)).astype('int16')
-        wav.write(output_file_path, sample_rate, audio_output.T)
+        # the float audio is passed as is: libsndfile does the scaling and clipping
+        # to 16-bit PCM while it writes
+        sf.write(output_file_path, self.audio_data.T, sample_rate,
+                 format='WAV', subtype=f'PCM_{constants.DEFAULT_BIT_DEPTH}')
 
     ##################################################
     #                Active Region
@@ -952,15 +970,7 @@ class AudioSignal(object):
         Returns:
             np.ndarray: Window returned by scipy.signa.get_window
         """
-        if window_type == constants.WINDOW_SQRT_HANN:
-            window = np.sqrt(scipy.signal.get_window(
-                'hann', window_length
-            ))
-        else:
-            window = scipy.signal.get_window(
-                window_type, window_length)
-
-        return window
+        return np.copy(_get_cached_window(window_type, window_length))
 
     def stft(self, window_length=None, hop_length=None, window_type=None, overwrite=True):
         """
@@ -1002,17 +1012,18 @@ class AudioSignal(object):
             else window_type
         )
 
-        stft_data = []
+        window = _get_cached_window(window_type, window_length)
 
-        window = self.get_window(window_type, window_length)
+        # scipy.signal.stft works along the last axis, so all channels are
+        # transformed in one call: (n_channels, n_samples) -> (n_channels, F, T).
+        # The audio is real, so only the non-negative frequencies are computed (rfft).
+        with scipy.fft.set_workers(constants.FFT_WORKERS):
+            _, _, stft_data = scipy.signal.stft(
+                self.audio_data, fs=self.sample_rate, window=window,
+                nperseg=window_length, noverlap=window_length - hop_length,
+                return_onesided=True)
 
-        for chan in self.get_channels():
-            _, _, _stft = scipy.signal.stft(
-                chan, fs=self.sample_rate, window=window,
-                nperseg=window_length, noverlap=window_length - hop_length)
-            stft_data.append(_stft)
-
-        stft_data = np.array(stft_data).transpose((1, 2, 0))
+        stft_data = stft_data.transpose((1, 2, 0))
 
         if overwrite:
             self.stft_data = stft_data
@@ -1060,18 +1071,14 @@ class AudioSignal(object):
             else window_type
         )
 
-        signals = []
-
-        window = self.get_window(window_type, window_length)
+        window = _get_cached_window(window_type, window_length)
 
-        for stft in self.get_stft_channels():
-            _, _signal = scipy.signal.istft(
-                stft, fs=self.sample_rate, window=window,
-                nperseg=window_length, noverlap=window_length - hop_length)
-
-            signals.append(_signal)
-
-        calculated_signal = np.array(signals)
+        # All channels are inverted in one call: (F, T, n_channels) -> (n_channels, n_samples)
+        with scipy.fft.set_workers(constants.FFT_WORKERS):
+            _, calculated_signal = scipy.signal.istft(
+                self.stft_data.transpose((2, 0, 1)), fs=self.sample_rate, window=window,
+                nperseg=window_length, noverlap=window_length - hop_length,
+                input_onesided=True)
 
         # Make sure it's shaped correctly
         calculated_signal = np.expand_dims(calculated_signal, -1) \
@@ -1123,9 +1130,11 @@ class AudioSignal(object):
                     f' {mask.shape}, self.stft_data: {self.stft_data.shape}'
                 )
 
-        magnitude, phase = np.abs(self.stft_data), np.angle(self.stft_data)
-        masked_abs = magnitude * mask.mask
-        masked_stft = masked_abs * np.exp(1j * phase)
+        # scaling the magnitude and putting the phase back is the same as scaling the
+        # complex STFT by the (real) mask, so skip the abs/angle/exp round trip and
+        # keep the precision of stft_data
+        masked_stft = self.stft_data * mask.mask.astype(
+            self.stft_data.real.dtype, copy=False)
 
         if overwrite:
             self.stft_data = masked_stft
@@ -1282,8 +1291,8 @@ class AudioSignal(object):
 
         self._verify_audio_arithmetic(other)
 
-        new_signal = copy.deepcopy(self)
-        new_signal.audio_data = self.audio_data + other.audio_data
+        new_signal = self._copy_without_audio_data()
+        new_signal.audio_data = np.add(self.audio_data, other.audio_data)
 
         return new_signal
 
@@ -1306,9 +1315,31 @@ class AudioSignal(object):
         """
         self._verify_audio_arithmetic(other)
 
-        other_copy = copy.deepcopy(other)
-        other_copy *= -1
-        return self.add(other_copy)
+        new_signal = self._copy_without_audio_data()
+        new_signal.audio_data = np.subtract(self.audio_data, other.audio_data)
+
+        return new_signal
+
+    def _copy_without_audio_data(self, copy_stft_data=True):
+        """
+        Deep copies this :class:`AudioSignal` object except for :attr:`audio_data`,
+        which is left as ``None``. Used when the audio data of the copy is about to
+        be replaced, so copying the old samples would be wasted work.
+
+        Args:
+            copy_stft_data (bool): If ``False``, :attr:`stft_data` is not copied
+                either and is left as ``None``.
+
+        Returns:
+            (:class:`AudioSignal`): A copy of this :class:`AudioSignal` object without
+            :attr:`audio_data`.
+        """
+        # deepcopy consults the memo before copying, so mapping the audio buffer
+        # to None skips it
+        memo = {id(self._audio_data): None}
+        if not copy_stft_data:
+            memo[id(self._stft_data)] = None
+        return copy.deepcopy(self, memo)
 
     def make_copy_with_audio_data(self, audio_data, verbose=True):
         """ Makes a copy of this :class:`AudioSignal` object with :attr:`audio_data` initialized to
@@ -1332,9 +1363,8 @@ class AudioSignal(object):
             if audio_data.shape != self.audio_data.shape:
                 warnings.warn('Shape of new audio_data does not match current audio_data.')
 
-        new_signal = copy.deepcopy(self)
+        new_signal = self._copy_without_audio_data(copy_stft_data=False)
         new_signal.audio_data = audio_data
-        new_signal.stft_data = None
         return new_signal
 
     def make_copy_with_stft_data(self, stft_data, verbose=True):
@@ -1358,10 +1388,9 @@ class AudioSignal(object):
             if stft_data.shape != self.stft_data.shape:
                 warnings.warn('Shape of new stft_data does not match current stft_data.')
 
-        new_signal = copy.deepcopy(self)
+        new_signal = self._copy_without_audio_data(copy_stft_data=False)
         new_signal.stft_data = stft_data
         new_signal.original_signal_length = self.original_signal_length
-        new_signal.audio_data = None
         return new_signal
 
     def loudness(self, filter_class='K-weighting', block_size=0.400):
@@ -1409,16 +1438,14 @@ class AudioSignal(object):
             (float): Root-mean-square of :attr:`audio_data`.
 
         """
+        # all channels at once, on the (n_channels, n_samples) array
         if win_len is not None:
             hop_len = win_len // 2 if hop_len is None else hop_len
-            rms_func = lambda arr: librosa.feature.rms(arr, frame_length=win_len,
-                                                       hop_length=hop_len)[0, :]
+            result = librosa.feature.rms(y=self.audio_data, frame_length=win_len,
+                                         hop_length=hop_len)[:, 0, :]
         else:
-            rms_func = lambda arr: np.sqrt(np.mean(np.square(arr)))
-
-        result = []
-        for ch in self.get_channels():
-            result.append(rms_func(ch))
+            result = np.sqrt(
+                np.mean(np.square(self.audio_data), axis=constants.LEN_INDEX))
 
         return np.squeeze(result)
 
@@ -1461,14 +1488,10 @@ class AudioSignal(object):
             warnings.warn('Cannot resample to the same sample rate.')
             return
 
-        resampled_signal = []
-
-        for channel in self.get_channels():
-            resampled_channel = librosa.resample(
-                channel, self.sample_rate, new_sample_rate, **kwargs)
-            resampled_signal.append(resampled_channel)
-
-        self.audio_data = np.array(resampled_signal)
+        # librosa resamples along the last axis, so all channels go in one call
+        self.audio_data = librosa.resample(
+            self.audio_data, orig_sr=self.sample_rate, target_sr=new_sample_rate,
+            **kwargs)
         self.original_signal_length = self.signal_length
         self._sample_rate = new_sample_rate
 
@@ -1598,10 +1621,12 @@ class AudioSignal(object):
             (:obj:`np.array`): the power spectrogram data in the n-th channel of the signal, 1D
         """
         self._verify_get_channel(n)
+        if self.stft_data is None:
+            raise AudioSignalException('Cannot calculate power_spectrogram_data '
+                                       'because self.stft_data is None')
 
-        # np.array helps with duck typing
-        return utils._get_axis(np.array(self.power_spectrogram_data),
-                               constants.STFT_CHAN_INDEX, n)
+        # only the requested channel is converted to a power spectrogram
+        return np.abs(utils._get_axis(self.stft_data, constants.STFT_CHAN_INDEX, n)) ** 2
 
     def get_magnitude_spectrogram_channel(self, n):
         """ Returns the n-th channel from ``self.magnitude_spectrogram_data``.
@@ -1616,10 +1641,12 @@ class AudioSignal(object):
             (:obj:`np.array`): the magnitude spectrogram data in the n-th channel of the signal, 1D
         """
         self._verify_get_channel(n)
+        if self.stft_data is None:
+            raise AudioSignalException('Cannot calculate magnitude_spectrogram_data '
+                                       'because self.stft_data is None')
 
-        # np.array helps with duck typing
-        return utils._get_axis(np.array(self.magnitude_spectrogram_data),
-                               constants.STFT_CHAN_INDEX, n)
+        # only the requested channel is converted to a magnitude spectrogram
+        return np.abs(utils._get_axis(self.stft_data, constants.STFT_CHAN_INDEX, n))
 
     def to_mono(self, overwrite=True, keep_dims=False):
         """ Converts :attr:`audio_data` to mono by averaging every sample.
@@ -2389,6 +2416,35 @@ class AudioSignal(object):
         return not self == other
 
 
+@functools.lru_cache(maxsize=32)
+def _check_cola_cached(window_type, window_length, hop_length):
+    """
+    Runs :func:`scipy.signal.check_COLA` once per STFT configuration. The check
+    builds a window every time, and :attr:`AudioSignal.stft_params` is set for every
+    new :class:`AudioSignal`, mostly with the same parameters.
+    """
+    return check_COLA(window_type, window_length, hop_length)
+
+
+@functools.lru_cache(maxsize=32)
+def _get_cached_window(window_type, window_length):
+    """
+    Computes the window for :func:`AudioSignal.get_window` once per
+    ``(window_type, window_length)``, as it is needed for every STFT and iSTFT.
+    The cached array is shared, so it is made read-only.
+    """
+    if window_type == constants.WINDOW_SQRT_HANN:
+        window = np.sqrt(scipy.signal.get_window(
+            'hann', window_length
+        ))
+    else:
+        window = scipy.signal.get_window(
+            window_type, window_length)
+
+    window.setflags(write=False)
+    return window
+
+
 class AudioSignalException(Exception):
     """
     Exception class for :class:`AudioSignal`.
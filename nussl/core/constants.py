@@ -85,6 +85,9 @@ NUSSL_EFZ_MODEL_METADATA_URL = urljoin(NUSSL_EFZ_BASE_URL, 'model-metadata.json'
 DEFAULT_DOWNLOAD_DIRECTORY = os.path.expanduser('~/.nussl/')
 
 USE_LIBROSA_STFT = False  #: (bool): Whether *nussl* will use librosa's stft function by default
+#: (int): Number of workers scipy.fft uses for batched FFTs (e.g. the STFT). Set from the
+#: ``NUSSL_FFT_WORKERS`` environment variable, 1 by default, -1 uses all cores
+FFT_WORKERS = int(os.environ.get('NUSSL_FFT_WORKERS', 1))
 
 
 # ############# MUSDB interface ############### #
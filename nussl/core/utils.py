@@ -83,59 +83,165 @@ def find_peak_indices(input_array, n_peaks, min_dist=None, do_min=False, thresho
     if input_array.ndim > 2:
         raise ValueError('Cannot find peak indices on data greater than 2 dimensions!')
 
-    is_1d = input_array.ndim == 1
-    zero_dist = zero_dist0 = zero_dist1 = None
     min_dist = len(input_array) // 4 if min_dist is None else min_dist
 
-    if is_1d:
-        zero_dist = min_dist
+    if input_array.ndim == 1:
+        zero_dists = (min_dist,)
     else:
         if type(min_dist) is int:
-            zero_dist0 = zero_dist1 = min_dist
+            zero_dists = (min_dist, min_dist)
         elif len(min_dist) == 1:
-            zero_dist0 = zero_dist1 = min_dist[0]
+            zero_dists = (min_dist[0], min_dist[0])
         else:
-            zero_dist0, zero_dist1 = min_dist
+            zero_dists = tuple(min_dist)
 
-    # scale input_array between [0.0, 1.0]
-    input_array -= np.min(input_array)
-    input_array /= np.max(input_array)
+    input_array, candidates = _scale_and_threshold(input_array, do_min, threshold)
 
-    # flip sign if doing min
-    input_array = -input_array if do_min else input_array
+    # check to make sure we didn't throw everything out
+    num_candidates = np.count_nonzero(candidates)
+    if num_candidates == 0:
+        raise ValueError('Threshold set incorrectly. No peaks above threshold.')
+    # the warning has always counted nonzero coordinates (np.size(np.nonzero(...))),
+    # i.e. two per point for 2D input, so keep that threshold
+    if num_candidates * input_array.ndim < n_peaks:
+        warnings.warn('Threshold set such that there will be less peaks than n_peaks.')
+
+    order = np.argsort(-input_array, axis=None, kind='stable')
+    return _pick_peaks(input_array, order, n_peaks, zero_dists, candidates)
+
+
+# rows of the input to _find_peak_indices_per_row are scaled and sorted in blocks
+# of about this many elements, so its temporaries stay bounded
+_PEAK_ROWS_BLOCK_ELEMENTS = 2 ** 20
+
+
+def _find_peak_indices_per_row(input_array, n_peaks, min_dist=None, do_min=False,
+                               threshold=0.5):
+    """
+    Same as calling :func:`find_peak_indices` on every row of a 2D array (with
+    an integer or float ``min_dist``), but the scaling, thresholding and sorting
+    are done for a block of rows at once. Floating point input keeps its dtype.
+
+    Returns:
+        peak_indices: (list) list with the list of peak indices of each row
+    """
+    input_array = np.asarray(input_array)
+    dtype = input_array.dtype if np.issubdtype(input_array.dtype, np.floating) else float
+    n_rows, n_cols = input_array.shape
+    min_dist = n_cols // 4 if min_dist is None else min_dist
+    rows_per_block = max(1, _PEAK_ROWS_BLOCK_ELEMENTS // max(n_cols, 1))
+
+    too_few_peaks = False
+    peak_indices = []
+    for start in range(0, n_rows, rows_per_block):
+        # copy, as the block is scaled in place
+        block = np.array(input_array[start:start + rows_per_block], dtype=dtype)
+        block, candidates = _scale_and_threshold(block, do_min, threshold, axis=1)
+
+        num_candidates = np.count_nonzero(candidates, axis=1)
+        if np.any(num_candidates == 0):
+            raise ValueError('Threshold set incorrectly. No peaks above threshold.')
+        too_few_peaks = too_few_peaks or np.any(num_candidates < n_peaks)
+
+        orders = np.argsort(-block, axis=1, kind='stable')
+        peak_indices.extend(
+            _pick_peaks(row, order, n_peaks, (min_dist,), row_candidates)
+            for row, order, row_candidates in zip(block, orders, candidates)
+        )
+
+    if too_few_peaks:
+        warnings.warn('Threshold set such that there will be less peaks than n_peaks.')
+    return peak_indices
+
+
+def _scale_and_threshold(input_array, do_min, threshold, axis=None):
+    """
+    Scales ``input_array`` (in place) and throws out everything below ``threshold``.
+    Returns the scaled array and a boolean array of the points that can be peaks.
+    """
+    # scale input_array between [0.0, 1.0]. This divides rather than multiplying
+    # by the reciprocal, so that the maximum comes out as exactly 1.0
+    input_array -= np.min(input_array, axis=axis, keepdims=True)
+    input_array /= np.max(input_array, axis=axis, keepdims=True)
+
+    if do_min:
+        # flip sign, so the minima are the largest values. Thrown out values go to
+        # -inf, as 0 would sort above every (non-positive) candidate
+        np.negative(input_array, out=input_array)
+        candidates = input_array >= threshold
+        input_array[~candidates] = -np.inf
+        return input_array, candidates
 
     # throw out everything below threshold
     input_array = np.multiply(input_array, (input_array >= threshold))
+    return input_array, input_array != 0
 
-    # check to make sure we didn't throw everything out
-    if np.size(np.nonzero(input_array)) == 0:
-        raise ValueError('Threshold set incorrectly. No peaks above threshold.')
-    if np.size(np.nonzero(input_array)) < n_peaks:
-        warnings.warn('Threshold set such that there will be less peaks than n_peaks.')
+
+def _pick_peaks(input_array, order, n_peaks, zero_dists, candidates):
+    """
+    Walks the values of ``input_array`` from largest to smallest once, following
+    ``order`` (a stable descending argsort, so ties go to the lowest flat index like
+    np.argmax would), instead of searching the whole array for each peak. Points
+    around a peak are suppressed rather than zeroed out, and the search stops once
+    every candidate (see :func:`_scale_and_threshold`) has been suppressed.
+    """
+    if input_array.ndim == 1:
+        return _pick_peaks_1d(input_array, order, n_peaks, zero_dists[0], candidates)
+
+    suppressed = np.zeros(input_array.shape, dtype=bool)
+    num_nonzero = np.count_nonzero(candidates)
 
     peak_indices = []
-    for i in range(n_peaks):
+    for idx in order:
+        if suppressed.flat[idx]:
+            continue
+
         # np.unravel_index for 2D indices e.g., index 5 in a 3x3 array should be (1, 2)
         # Also, wrap in list for duck typing
-        cur_peak_idx = list(np.unravel_index(
-            np.argmax(input_array.flatten()), input_array.shape
-        ))
-
-        # zero out peak and its surroundings
-        if is_1d:
-            cur_peak_idx = cur_peak_idx[0]
-            peak_indices.append(cur_peak_idx)
-            lower, upper = _set_array_zero_indices(cur_peak_idx, zero_dist, len(input_array))
-            input_array[lower:upper] = 0
-        else:
-            peak_indices.append(cur_peak_idx)
-            lower0, upper0 = _set_array_zero_indices(cur_peak_idx[0], zero_dist0,
-                                                     input_array.shape[0])
-            lower1, upper1 = _set_array_zero_indices(cur_peak_idx[1], zero_dist1,
-                                                     input_array.shape[1])
-            input_array[lower0:upper0, lower1:upper1] = 0
-
-        if np.sum(input_array) == 0.0:
+        cur_peak_idx = list(np.unravel_index(idx, input_array.shape))
+
+        # suppress peak and its surroundings
+        region = tuple(
+            slice(*_set_array_zero_indices(i, zero_dist, max_len))
+            for i, zero_dist, max_len in zip(cur_peak_idx, zero_dists, input_array.shape)
+        )
+        peak_indices.append(cur_peak_idx)
+
+        num_nonzero -= np.count_nonzero(
+            candidates[region][~suppressed[region]])
+        suppressed[region] = True
+
+        if len(peak_indices) == n_peaks or num_nonzero == 0:
+            break
+
+    return peak_indices
+
+
+def _pick_peaks_1d(input_array, order, n_peaks, zero_dist, candidates):
+    """
+    1D version of :func:`_pick_peaks`. The walk is scalar, so it runs on plain Python
+    ints and a bytearray instead of paying for numpy scalar indexing at every step.
+    """
+    length = input_array.shape[0]
+    is_nonzero = candidates.tolist()
+    suppressed = bytearray(length)
+    num_nonzero = sum(is_nonzero)
+
+    peak_indices = []
+    for idx in order.tolist():
+        if suppressed[idx]:
+            continue
+
+        peak_indices.append(idx)
+
+        # suppress peak and its surroundings
+        lower, upper = _set_array_zero_indices(idx, zero_dist, length)
+        for i in range(lower, upper):
+            if not suppressed[i]:
+                suppressed[i] = 1
+                num_nonzero -= is_nonzero[i]
+
+        if len(peak_indices) == n_peaks or num_nonzero == 0:
             break
 
     return peak_indices
@@ -3,6 +3,8 @@ Base class for separation algorithms that make masks. Most algorithms in
 nussl are derived from MaskSeparationBase. 
 """
 
+import numpy as np
+
 from ...core import masks
 from . import SeparationBase
 from .separation_base import SeparationException
@@ -182,6 +184,28 @@ class MaskSeparationBase(SeparationBase):
         """
         return self.mask_type.ones(shape)
 
+    def _apply_high_pass_cutoff(self, mask_data, high_pass_cutoff, is_background):
+        """
+        Gives the frequency bins below ``high_pass_cutoff`` to the background, in
+        place: they are set to 1 in the background mask data and to 0 otherwise.
+
+        Args:
+            mask_data (np.ndarray): Mask data with frequency on the first axis.
+            high_pass_cutoff (float): Cutoff (in Hz) of the high pass filter.
+            is_background (bool): Whether ``mask_data`` is the background mask.
+
+        Returns:
+            The same ``mask_data`` array.
+        """
+        # the closest bin is found like HighLowPassFilter does, but the rows are
+        # written directly instead of building (and copying the signal for) a
+        # second pair of full-size masks
+        high_pass_bin = (
+            np.abs(self.audio_signal.freq_vector - high_pass_cutoff)
+        ).argmin()
+        mask_data[:high_pass_bin, ...] = 1 if is_background else 0
+        return mask_data
+
     def _preprocess_audio_signal(self):
         """
         Masking based separation algorithm always need an STFT to work with. 
@@ -1,8 +1,7 @@
 import numpy as np
-import scipy.fftpack as scifft
+import scipy.fft as scifft
 
 from .. import MaskSeparationBase, SeparationException
-from ..benchmark import HighLowPassFilter
 from ...core import constants
 
 
@@ -50,6 +49,10 @@ class Repet(MaskSeparationBase):
                  period=None, high_pass_cutoff=100.0, mask_type='soft',
                  mask_threshold=0.5):
 
+        # set by _preprocess_audio_signal, but only if the signal has data
+        self.magnitude_spectrogram = None
+        self.beat_spectrum = None
+
         super().__init__(
             input_audio_signal=input_audio_signal,
             mask_type=mask_type,
@@ -72,33 +75,26 @@ class Repet(MaskSeparationBase):
             self._is_period_converted_to_hops = True
 
         self.high_pass_cutoff = high_pass_cutoff
-        self.magnitude_spectrogram = None
         self.repeating_period = None
-        self.beat_spectrum = None
 
-    def run(self):
-        high_low = HighLowPassFilter(self.audio_signal, self.high_pass_cutoff)
-        high_pass_masks = high_low.run()
+    def _preprocess_audio_signal(self):
+        super()._preprocess_audio_signal()
 
+        # computed once per audio signal and shared by run() and get_beat_spectrum()
         self.magnitude_spectrogram = np.abs(self.stft)
+        self.beat_spectrum = None
 
-        background_masks = []
-        foreground_masks = []
-
+    def run(self):
         self.repeating_period = self._calculate_repeating_period()
 
-        for ch in range(self.audio_signal.num_channels):
-            background_mask = self._compute_repeating_mask(
-                self.magnitude_spectrogram[..., ch])
-            foreground_mask = 1 - background_mask
-
-            background_masks.append(background_mask)
-            foreground_masks.append(foreground_mask)
+        # the repeating period is shared by all channels, so the background masks of
+        # every channel are computed in one go. Both masks go straight into one
+        # preallocated (..., n_channels, 2) buffer
+        background_masks = self._compute_repeating_mask(self.magnitude_spectrogram)
 
-        background_masks = np.stack(background_masks, axis=-1)
-        foreground_masks = np.stack(foreground_masks, axis=-1)
-
-        _masks = np.stack([background_masks, foreground_masks], axis=-1)
+        _masks = np.empty(background_masks.shape + (2,), dtype=background_masks.dtype)
+        _masks[..., 0] = background_masks
+        np.subtract(1, background_masks, out=_masks[..., 1])
 
         self.result_masks = []
 
@@ -107,10 +103,8 @@ class Repet(MaskSeparationBase):
             if self.mask_type == self.MASKS['binary']:
                 mask_data = _masks[..., i] == np.max(_masks, axis=-1)
 
-            if i == 0:
-                mask_data = np.maximum(mask_data, high_pass_masks[i].mask)
-            elif i == 1:
-                mask_data = np.minimum(mask_data, high_pass_masks[i].mask)
+            self._apply_high_pass_cutoff(
+                mask_data, self.high_pass_cutoff, is_background=i == 0)
 
             mask = self.mask_type(mask_data)
             self.result_masks.append(mask)
@@ -120,7 +114,7 @@ class Repet(MaskSeparationBase):
     def get_beat_spectrum(self):
         """
         Calculates and returns the beat spectrum for the audio signal associated 
-        with this object
+        with this object. The beat spectrum is cached until a new audio signal is set.
 
         Returns:
             beat_spectrum (np.array): beat spectrum for the audio file
@@ -140,11 +134,21 @@ class Repet(MaskSeparationBase):
             beat_spec = repet.get_beat_spectrum()
             
         """
+        if self.beat_spectrum is not None:
+            return self.beat_spectrum
+
         # TODO: Make this multi-channel. The np.mean() reduces the n channels to 1.       
-        self.beat_spectrum = self.compute_beat_spectrum(
-            np.mean(np.square(self.magnitude_spectrogram),
-                    axis=constants.STFT_CHAN_INDEX).T
-        )
+        if self.magnitude_spectrogram.shape[constants.STFT_CHAN_INDEX] == 1:
+            # mono: the mean over channels is the only channel, skip the reduction
+            power_spectrogram = np.square(self.magnitude_spectrogram[..., 0])
+        else:
+            # square and sum over channels in one pass, without a squared copy of
+            # every channel
+            power_spectrogram = np.einsum(
+                'ijk,ijk->ij', self.magnitude_spectrogram, self.magnitude_spectrogram)
+            power_spectrogram /= self.magnitude_spectrogram.shape[
+                constants.STFT_CHAN_INDEX]
+        self.beat_spectrum = self.compute_beat_spectrum(power_spectrogram.T)
         return self.beat_spectrum
 
     def _calculate_repeating_period(self):
@@ -186,27 +190,29 @@ class Repet(MaskSeparationBase):
             (`See PDF here <http://rotorbrain.com/foote/papers/icme2001.pdf>`_)
             
         """
-        freq_bins, time_bins = power_spectrogram.shape
+        freq_bins = power_spectrogram.shape[0]
 
-        # row-wise autocorrelation according to the Wiener-Khinchin theorem
-        power_spectrogram = np.vstack([power_spectrogram, np.zeros_like(power_spectrogram)])
+        # row-wise autocorrelation according to the Wiener-Khinchin theorem, zero
+        # padded to at least twice the length (the next power of two) so it isn't
+        # circular. The FFT pads with n= instead of copying into a padded array
+        n_fft = int(2 ** np.ceil(np.log(2 * freq_bins) / np.log(2)))
 
-        nearest_power_of_two = 2 ** np.ceil(np.log(power_spectrogram.shape[0]) / np.log(2))
-        pad_amount = int(nearest_power_of_two - power_spectrogram.shape[0])
-        power_spectrogram = np.pad(power_spectrogram, ((0, pad_amount), (0, 0)), 'constant')
-        fft_power_spec = scifft.fft(power_spectrogram, axis=0)
-        abs_fft = np.abs(fft_power_spec) ** 2
-        autocorrelation_rows = np.real(
-            scifft.ifft(abs_fft, axis=0)[:freq_bins, :])  # ifft over columns
-
-        # normalization factor
-        norm_factor = np.tile(np.arange(freq_bins, 0, -1), (time_bins, 1)).T
-        autocorrelation_rows = autocorrelation_rows / norm_factor
+        # the spectrogram is real, so only half of its spectrum has to be computed
+        fft_power_spec = scifft.rfft(
+            power_spectrogram, n=n_fft, axis=0, workers=constants.FFT_WORKERS)
+        abs_fft = np.square(fft_power_spec.real) + np.square(fft_power_spec.imag)
+        autocorrelation_rows = scifft.irfft(
+            abs_fft, n=n_fft, axis=0,
+            workers=constants.FFT_WORKERS)[:freq_bins, :]  # ifft over columns
 
         # compute the beat spectrum
         beat_spectrum = np.mean(autocorrelation_rows, axis=1)
         # average over frequencies
 
+        # normalization factor. It only depends on the lag, so it is applied to the
+        # average rather than to every row (in the beat spectrum's own precision)
+        beat_spectrum /= np.arange(freq_bins, 0, -1, dtype=beat_spectrum.dtype)
+
         return beat_spectrum
 
     @staticmethod
@@ -241,50 +247,55 @@ class Repet(MaskSeparationBase):
 
         return period
 
-    def _compute_repeating_mask(self, magnitude_spectrogram_channel):
+    def _compute_repeating_mask(self, magnitude_spectrogram):
         """
         Computes the soft mask for the repeating part using the magnitude 
-        spectrogram and the repeating period
+        spectrogram and the repeating period. The period is shared by all
+        channels, so they are all processed at once.
 
         Args:
-            magnitude_spectrogram_channel (:obj:`np.array`): 2D matrix containing the 
-              magnitude spectrogram of a signal
+            magnitude_spectrogram (:obj:`np.array`): magnitude spectrogram of shape
+              ``(n_freq, n_time)`` or ``(n_freq, n_time, n_channels)``.
             
         Returns:
-            (:obj:`np.array`): 2D matrix (Lf by Lt) containing the soft mask for the 
-              repeating part, elements of M take on values in ``[0, 1]``
+            (:obj:`np.array`): soft mask for the repeating part, same shape as
+              ``magnitude_spectrogram``, elements of M take on values in ``[0, 1]``
 
         """
         period = self.repeating_period
-        freq_bins, time_bins = magnitude_spectrogram_channel.shape
+        freq_bins, time_bins = magnitude_spectrogram.shape[:2]
+        channels = magnitude_spectrogram.shape[2:]
         n_repetitions = int(np.ceil(float(time_bins) / period))
-        one_period = freq_bins * period
-
-        # Pad to make an integer number of repetitions. Pad with 'nan's to not affect the median.
-        remainder = (period * n_repetitions) % time_bins
-        mask_reshaped = np.hstack(
-            [magnitude_spectrogram_channel,
-             float('nan') * np.zeros((freq_bins, remainder))]
-        )
-
-        # reshape to take the median of each period
-        mask_reshaped = np.reshape(mask_reshaped.T, (n_repetitions, one_period))
-
-        # take median of repeating periods before and after the padding
-        median_mask = np.nanmedian(mask_reshaped, axis=0)
-
-        # reshape to it's original shape
-        median_mask = np.reshape(
-            np.tile(median_mask, (n_repetitions, 1)),
-            (n_repetitions * period, freq_bins)).T
-        median_mask = median_mask[:, :time_bins]
-
-        # take minimum of computed mask and original input and scale
-        min_median_mask = np.minimum(median_mask, magnitude_spectrogram_channel)
-        mask = (min_median_mask + constants.EPSILON) / (
-                    magnitude_spectrogram_channel + constants.EPSILON)
 
-        return mask
+        # Split into the complete periods and the (possibly partial) last one, which
+        # has `tail` time bins, instead of padding it with 'nan's for nanmedian.
+        n_full = n_repetitions - 1
+        tail = time_bins - n_full * period
+        full_periods = magnitude_spectrogram[:, :n_full * period].reshape(
+            (freq_bins, n_full, period) + channels)
+        last_period = magnitude_spectrogram[:, n_full * period:]
+
+        # take the median of each period: the first `tail` bins of a period occur in
+        # every repetition, the remaining ones in all but the last
+        median_period = np.empty(
+            (freq_bins, period) + channels, dtype=magnitude_spectrogram.dtype)
+        median_period[:, :tail] = np.median(
+            np.concatenate([full_periods[:, :, :tail], last_period[:, None]], axis=1),
+            axis=1)
+        if n_full > 0:
+            median_period[:, tail:] = np.median(full_periods[:, :, tail:], axis=1)
+
+        # take minimum of computed mask and original input, broadcasting the median
+        # period against every repetition instead of tiling it, then scale. Both
+        # parts are written straight into the mask through (n_full, period) views.
+        median_mask = np.empty(magnitude_spectrogram.shape, dtype=median_period.dtype)
+        np.minimum(median_period[:, None], full_periods,
+                   out=median_mask[:, :n_full * period].reshape(full_periods.shape))
+        np.minimum(median_period[:, :tail], last_period, out=median_mask[:, n_full * period:])
+        median_mask += constants.EPSILON
+        median_mask /= magnitude_spectrogram + constants.EPSILON
+
+        return median_mask
 
     def _update_period(self, period):
         period = float(period)
@@ -1,10 +1,34 @@
 import numpy as np
+from scipy.linalg import get_blas_funcs
 
 from .. import MaskSeparationBase
-from ..benchmark import HighLowPassFilter
 from ...core import utils
 from ...core import constants
 
+# Max number of elements gathered at once when taking medians over similar frames.
+_MEDIAN_CHUNK_ELEMENTS = 2 ** 22
+
+# Max number of similarity matrix elements computed at once when the similar frames
+# are found without materializing the whole matrix.
+_SIMILARITY_TILE_ELEMENTS = 2 ** 22
+
+
+def _partition_median(values, axis):
+    """
+    Same as ``np.median(values, axis=axis)``, but only partitions ``values`` around
+    the middle element(s) (in place, so ``values`` must be a scratch array) instead
+    of sorting them.
+    """
+    n_values = values.shape[axis]
+    half = n_values // 2
+
+    if n_values % 2:
+        values.partition(half, axis=axis)
+        return np.take(values, half, axis=axis)
+
+    values.partition((half - 1, half), axis=axis)
+    return (np.take(values, half - 1, axis=axis) + np.take(values, half, axis=axis)) / 2
+
 
 class RepetSim(MaskSeparationBase):
     """
@@ -40,6 +64,10 @@ class RepetSim(MaskSeparationBase):
     def __init__(self, input_audio_signal, similarity_threshold=0, 
                  min_distance_between_frames=1, max_repeating_frames=100, 
                  high_pass_cutoff=100, mask_type='soft', mask_threshold=0.5):
+        # set by _preprocess_audio_signal, but only if the signal has data
+        self.magnitude_spectrogram = None
+        self.similarity_matrix = None
+
         super().__init__(
             input_audio_signal=input_audio_signal, 
             mask_type=mask_type,
@@ -52,33 +80,26 @@ class RepetSim(MaskSeparationBase):
 
         self._min_distance_converted_to_hops = False
 
-        self.similarity_matrix = None
         self.similarity_indices = None
-        self.magnitude_spectrogram = None
 
-    def run(self):
-        high_low = HighLowPassFilter(self.audio_signal, self.high_pass_cutoff)
-        high_pass_masks = high_low.run()
+    def _preprocess_audio_signal(self):
+        super()._preprocess_audio_signal()
 
+        # computed once per audio signal and shared by run() and get_similarity_matrix()
         self.magnitude_spectrogram = np.abs(self.stft)
+        self.similarity_matrix = None
 
-        background_masks = []
-        foreground_masks = []
-
+    def run(self):
         self.similarity_indices = self._get_similarity_indices()
 
-        for ch in range(self.audio_signal.num_channels):
-            background_mask = self._compute_mask(
-                self.magnitude_spectrogram[..., ch])
-            foreground_mask = 1 - background_mask
-            
-            background_masks.append(background_mask)
-            foreground_masks.append(foreground_mask)
-
-        background_masks = np.stack(background_masks, axis=-1)
-        foreground_masks = np.stack(foreground_masks, axis=-1)
+        # the similarity indices are shared by all channels, so the masks of
+        # every channel are computed in one go
+        background_masks = self._compute_mask(self.magnitude_spectrogram)
 
-        _masks = np.stack([background_masks, foreground_masks], axis=-1)
+        # write both masks straight into one (..., 2) buffer instead of stacking
+        _masks = np.empty(background_masks.shape + (2,), dtype=background_masks.dtype)
+        _masks[..., 0] = background_masks
+        np.subtract(1, background_masks, out=_masks[..., 1])
 
         self.result_masks = []
 
@@ -87,10 +108,8 @@ class RepetSim(MaskSeparationBase):
             if self.mask_type == self.MASKS['binary']:
                 mask_data = _masks[..., i] == np.max(_masks, axis=-1)
             
-            if i == 0:
-                mask_data = np.maximum(mask_data, high_pass_masks[i].mask)
-            elif i == 1:
-                mask_data = np.minimum(mask_data, high_pass_masks[i].mask)
+            self._apply_high_pass_cutoff(
+                mask_data, self.high_pass_cutoff, is_background=i == 0)
             
             mask = self.mask_type(mask_data)
             self.result_masks.append(mask)
@@ -98,8 +117,6 @@ class RepetSim(MaskSeparationBase):
         return self.result_masks
 
     def _get_similarity_indices(self):
-        self.similarity_matrix = self.get_similarity_matrix()
-
         if not self._min_distance_converted_to_hops:
             self.min_distance_between_frames *= (
                 self.audio_signal.sample_rate / self.stft_params.hop_length
@@ -117,27 +134,36 @@ class RepetSim(MaskSeparationBase):
         Returns:
             S (np.array): 2D similarity matrix
         """
-        # ignore the 'divide by zero' warning
-        with np.errstate(divide='ignore'):
-            # Code below is adopted from http://stackoverflow.com/a/20687984/5768001
+        # normalize every row first, so the cosine similarity is a single
+        # matrix product of the normalized rows with themselves
+        normalized = RepetSim._normalize_rows(matrix)
 
-            # base similarity matrix (all dot products)
-            similarity = np.dot(matrix, matrix.T)
+        # the product is symmetric, so let BLAS (syrk) compute only its upper
+        # triangle and mirror it into the lower one. normalized.T is passed with
+        # trans=1 because it is already Fortran-ordered, which saves the copy
+        # into Fortran order that the wrapper would otherwise make
+        syrk = get_blas_funcs('syrk', (normalized,))
+        upper = syrk(1.0, normalized.T, trans=1)
+        cosine = upper + np.triu(upper, 1).T
 
-            # inverse_mask of the squared magnitude of preference vectors (number of occurrences)
-            inv_square_mag = 1 / np.diag(similarity)
+        return cosine
 
-            # if it doesn't occur, set it's inverse_mask magnitude to zero (instead of inf)
-            inv_square_mag[np.isinf(inv_square_mag)] = 0
+    @staticmethod
+    def _normalize_rows(matrix):
+        """Scales every row of ``matrix`` to unit length (rows of zeros stay zero). The
+        result is written C-ordered even when ``matrix`` is a transposed view."""
+        # ignore the 'divide by zero' warning
+        with np.errstate(divide='ignore'):
+            # squared magnitude of each row (the diagonal of matrix @ matrix.T)
+            square_mag = np.einsum('ij,ij->i', matrix, matrix)
 
-            # inverse_mask of the magnitude
-            inv_mag = np.sqrt(inv_square_mag)
+            # inverse of the magnitude of each row
+            inv_mag = 1 / np.sqrt(square_mag)
 
-            # cosine similarity (element-wise multiply by inverse_mask magnitudes)
-            cosine = similarity * inv_mag
-            cosine = cosine.T * inv_mag
+        # if it doesn't occur, set it's inverse magnitude to zero (instead of inf)
+        inv_mag[np.isinf(inv_mag)] = 0
 
-            return cosine
+        return np.multiply(matrix, inv_mag[:, None], order='C')
 
     def _find_similarity_indices(self):
         """Finds the similarity indices for all time frames from the similarity matrix
@@ -145,42 +171,86 @@ class RepetSim(MaskSeparationBase):
         Returns:
             similarity_indices (list of lists): similarity indices for all time frames
         """
-        similarity_indices = []
-        for i in range(self.audio_signal.stft_length):
-            cur_indices = utils.find_peak_indices(
-                self.similarity_matrix[i, :], self.max_repeating_frames,
-                min_dist=self.min_distance_between_frames,
-                threshold=self.similarity_threshold)
-
-            # the first peak is always itself so we throw it out
-            # we also want only self.max_repeating_frames peaks
-            # so +1 for 0-based, and +1 for the first peak we threw out
-            cur_indices = cur_indices[1:self.max_repeating_frames + 2]
-            similarity_indices.append(cur_indices)
+        # Only the peaks of each row are needed, so go through the similarity matrix
+        # a block of rows at a time and keep just their peaks. If it has not been
+        # computed (and cached) yet, each block of rows is computed on the fly
+        # instead of holding the whole (n_time_bins, n_time_bins) matrix in memory
+        if self.similarity_matrix is not None:
+            n_frames = self.similarity_matrix.shape[0]
+
+            def similarity_rows(start, stop):
+                return self.similarity_matrix[start:stop]
+        else:
+            normalized = self._normalize_rows(self._mean_magnitude_spectrogram().T)
+            n_frames = normalized.shape[0]
+
+            def similarity_rows(start, stop):
+                return np.dot(normalized[start:stop], normalized.T)
+
+        rows_per_tile = max(1, _SIMILARITY_TILE_ELEMENTS // n_frames)
+        peak_indices = []
+        for start in range(0, n_frames, rows_per_tile):
+            tile = similarity_rows(start, start + rows_per_tile)
+            peak_indices.extend(self._find_peak_indices_per_row(tile))
+
+        # the first peak is always itself so we throw it out
+        # we also want only self.max_repeating_frames peaks
+        # so +1 for 0-based, and +1 for the first peak we threw out
+        similarity_indices = [
+            cur_indices[1:self.max_repeating_frames + 2]
+            for cur_indices in peak_indices
+        ]
 
         return similarity_indices
 
-    def _compute_mask(self, magnitude_spectrogram_channel):
-        mask = np.zeros_like(magnitude_spectrogram_channel)
-
-        for i in range(self.audio_signal.stft_length):
-            cur_similarities = self.similarity_indices[i]
+    def _find_peak_indices_per_row(self, similarity_rows):
+        return utils._find_peak_indices_per_row(
+            similarity_rows, self.max_repeating_frames,
+            min_dist=self.min_distance_between_frames,
+            threshold=self.similarity_threshold)
 
-            if not cur_similarities:
-                # If there are no similarities, then just add ones to the mask here.
-                mask[:, i] = np.ones(mask.shape[constants.STFT_VERT_INDEX])
-            else:
-                similar_times = np.array([magnitude_spectrogram_channel[:, j]
-                                          for j in cur_similarities])
+    def _compute_mask(self, magnitude_spectrogram):
+        """
+        Computes the soft mask for the repeating part from the median of the
+        similar frames of each time frame.
 
-                mask[:, i] = np.median(similar_times, axis=0)
+        Args:
+            magnitude_spectrogram (:obj:`np.array`): magnitude spectrogram of shape
+              ``(n_freq, n_time)`` or ``(n_freq, n_time, n_channels)``.
 
-        mask = np.minimum(mask, magnitude_spectrogram_channel)
-        mask = (mask + constants.EPSILON) / (magnitude_spectrogram_channel + constants.EPSILON)
+        Returns:
+            (:obj:`np.array`): soft mask for the repeating part, same shape as
+              ``magnitude_spectrogram``.
+        """
+        # If there are no similarities, then just leave ones in the mask there.
+        mask = np.ones_like(magnitude_spectrogram)
+        n_freq = mask.shape[constants.STFT_VERT_INDEX]
+        n_channels = int(np.prod(mask.shape[2:]))
+
+        # Frames with the same number of similar frames are processed together: their
+        # similar frames are gathered into an (n_freq, n_frames, n_similar, ...) block
+        # and the median is taken over the similar frames. Blocks are chunked to bound
+        # memory.
+        num_similar = np.array([len(s) for s in self.similarity_indices])
+        for n_similar in np.unique(num_similar[num_similar > 0]):
+            frames = np.flatnonzero(num_similar == n_similar)
+            chunk_size = max(
+                1, _MEDIAN_CHUNK_ELEMENTS // (n_freq * n_similar * n_channels))
+
+            for start in range(0, len(frames), chunk_size):
+                chunk = frames[start:start + chunk_size]
+                indices = np.array([self.similarity_indices[i] for i in chunk])
+                similar_times = magnitude_spectrogram[:, indices]
+                mask[:, chunk] = _partition_median(similar_times, axis=2)
+
+        np.minimum(mask, magnitude_spectrogram, out=mask)
+        mask += constants.EPSILON
+        mask /= magnitude_spectrogram + constants.EPSILON
         return mask
 
     def get_similarity_matrix(self):
-        """Calculates and returns the similarity matrix for the audio file associated with this object
+        """Calculates and returns the similarity matrix for the audio file associated with this object.
+        The similarity matrix is cached until a new audio signal is set.
 
         Returns:
              similarity_matrix (np.array): similarity matrix for the audio file.
@@ -197,5 +267,19 @@ class RepetSim(MaskSeparationBase):
             sim_mat = repet_sim.get_similarity_matrix()
 
         """
-        mean_magnitude_spectrogram = np.mean(self.magnitude_spectrogram, axis=2)
-        return self.compute_similarity_matrix(mean_magnitude_spectrogram.T)
+        if self.similarity_matrix is not None:
+            return self.similarity_matrix
+
+        self.similarity_matrix = self.compute_similarity_matrix(
+            self._mean_magnitude_spectrogram().T)
+        return self.similarity_matrix
+
+    def _mean_magnitude_spectrogram(self):
+        # single precision is plenty for picking similar frames, and halves the
+        # memory of the (n_time_bins, n_time_bins) similarity matrix
+        if self.magnitude_spectrogram.shape[-1] == 1:
+            # mono: the mean over channels is the only channel, skip the reduction
+            mean_magnitude_spectrogram = self.magnitude_spectrogram[..., 0]
+        else:
+            mean_magnitude_spectrogram = np.mean(self.magnitude_spectrogram, axis=2)
+        return mean_magnitude_spectrogram.astype(np.float32, copy=False)
@@ -1,9 +1,10 @@
 import numpy as np
-from scipy import signal
+from scipy import ndimage
 
 from .. import MaskSeparationBase
 from ...core import utils
 from ...core import constants
+from ...core.audio_signal import AudioSignalException
 
 
 class Duet(MaskSeparationBase):
@@ -71,8 +72,8 @@ class Duet(MaskSeparationBase):
 
         stft_ch1 (np.array): A Numpy matrix containing the stft data of channel 1.
 
-        frequency_matrix (np.array): A Numpy matrix containing the frequencies of 
-          analysis.
+        frequency_matrix (np.array): A Numpy column vector of shape (n_frequency_bins, 1)
+          containing the frequencies of analysis. It broadcasts against the STFT arrays.
 
         symmetric_atn (np.array): A Numpy matrix containing the symmetric attenuation 
           between the two channels.
@@ -210,34 +211,49 @@ class Duet(MaskSeparationBase):
             sample_rate (integer): sample rate
 
         Returns:
-            stft_ch0 (np.matrix): a 2D Numpy matrix containing the stft of channel 0
-            stft_ch1 (np.matrix): a 2D Numpy matrix containing the stft of channel 1
-            wmat (np.matrix): a 2D Numpy matrix containing the frequencies of analysis of the Fourier transform
+            stft_ch0 (np.ndarray): a 2D Numpy array containing the stft of channel 0
+            stft_ch1 (np.ndarray): a 2D Numpy array containing the stft of channel 1
+            wmat (np.ndarray): a (n_frequency_bins, 1) Numpy array containing the frequencies of analysis of
+              the Fourier transform, broadcastable against the stft of each channel
         """
 
-        # Compute the stft of the two channel mixtures
-        self.audio_signal.stft_params = self.stft_params
-        self.audio_signal.stft()
-
-        stft_ch0 = self.audio_signal.get_stft_channel(0)
-        stft_ch1 = self.audio_signal.get_stft_channel(1)
-
-        # Compute the freq. matrix for later use in phase calculations
-        n_time_bins = len(self.audio_signal.time_bins_vector)
-        wmat = np.array(np.tile(np.mat(
-            self.audio_signal.freq_vector).T, (1, n_time_bins))) * (
-            2 * np.pi / sample_rate)
+        n_channels = self.audio_signal.num_channels
+        if n_channels < 2:
+            raise AudioSignalException(
+                f'Cannot get channel 1 when this object only has {n_channels}'
+                ' channels! (0-based)'
+            )
+
+        # The stft of the two channel mixtures is computed once when the audio
+        # signal is set (see MaskSeparationBase), so just take views into it.
+        stft_ch0 = self.stft[..., 0]
+        stft_ch1 = self.stft[..., 1]
+
+        # Compute the freq. matrix for later use in phase calculations. It is constant
+        # across time, so it is kept as a column and broadcast where it is used. It
+        # takes the precision of the stft so that float32 audio stays in float32.
+        wmat = self.audio_signal.freq_vector[:, None] * (2 * np.pi / sample_rate)
+        wmat = wmat.astype(stft_ch0.real.dtype)
         wmat += constants.EPSILON
         return stft_ch0, stft_ch1, wmat
 
     @staticmethod
     def _compute_atn_delay(stft_ch0, stft_ch1, frequency_matrix):
         # Calculate the symmetric attenuation (alpha) and delay (delta) for each
-        # time-freq. point
-        inter_channel_ratio = (stft_ch1 + constants.EPSILON) / (stft_ch0 + constants.EPSILON)
-        attenuation = np.abs(inter_channel_ratio)  # relative attenuation between the two channels
-        symmetric_attenuation = attenuation - 1 / attenuation  # symmetric attenuation
-        relative_delay = -np.imag(np.log(inter_channel_ratio)) / (2 * np.pi * frequency_matrix)  # relative delay
+        # time-freq. point. Only the magnitude and phase of the inter-channel ratio are
+        # needed, so no complex division is done.
+
+        # relative attenuation between the two channels
+        attenuation = np.abs(stft_ch1)
+        attenuation /= np.maximum(np.abs(stft_ch0), constants.EPSILON)
+
+        # symmetric attenuation
+        symmetric_attenuation = np.reciprocal(np.maximum(attenuation, constants.EPSILON))
+        np.subtract(attenuation, symmetric_attenuation, out=symmetric_attenuation)
+
+        # relative delay; arg(ch1 / ch0) == arg(ch1 * conj(ch0)), which wraps the same way
+        relative_delay = np.angle(stft_ch1 * np.conj(stft_ch0))
+        relative_delay /= -2 * np.pi * frequency_matrix
         return symmetric_attenuation, relative_delay
 
     def _make_histogram(self):
@@ -257,28 +273,38 @@ class Duet(MaskSeparationBase):
             delay_bins (np.array): The range of delay values distributed into bins
         """
         # calculate the weighted histogram
-        time_frequency_weights = (np.abs(self.stft_ch0) * np.abs(self.stft_ch1)) ** self.p * \
-                                 (np.abs(self.frequency_matrix)) ** self.q
+        time_frequency_weights = np.abs(self.stft_ch0)
+        time_frequency_weights *= np.abs(self.stft_ch1)
+        time_frequency_weights **= self.p
+        time_frequency_weights *= np.abs(self.frequency_matrix) ** self.q
 
         # only consider time-freq. points yielding estimates in bounds
-        attenuation_premask = np.logical_and(self.attenuation_min < self.symmetric_atn,
-                                             self.symmetric_atn < self.attenuation_max)
-
-        delay_premask = np.logical_and(self.delay_min < self.delay, self.delay < self.delay_max)
-        attenuation_delay_premask = np.logical_and(attenuation_premask, delay_premask)
-
-        nonzero_premask = np.nonzero(attenuation_delay_premask)
-        symmetric_attenuation_vector = self.symmetric_atn[nonzero_premask]
-        delay_vector = self.delay[nonzero_premask]
-        time_frequency_weights_vector = time_frequency_weights[nonzero_premask]
-
-        bins_array = np.array([self.num_attenuation_bins, self.num_delay_bins])
-        range_array = np.array([[self.attenuation_min, self.attenuation_max], [self.delay_min, self.delay_max]])
-
-        # compute the histogram
-        histogram, atn_bins, delay_bins = np.histogram2d(symmetric_attenuation_vector, delay_vector,
-                                                         bins=bins_array, range=range_array,
-                                                         weights=time_frequency_weights_vector)
+        attenuation_delay_premask = self.attenuation_min < self.symmetric_atn
+        attenuation_delay_premask &= self.symmetric_atn < self.attenuation_max
+        attenuation_delay_premask &= self.delay_min < self.delay
+        attenuation_delay_premask &= self.delay < self.delay_max
+
+        atn_bins = np.linspace(
+            self.attenuation_min, self.attenuation_max, self.num_attenuation_bins + 1)
+        delay_bins = np.linspace(
+            self.delay_min, self.delay_max, self.num_delay_bins + 1)
+
+        # compute the histogram: every time-freq. point is assigned a flat bin index and
+        # points out of bounds get no weight, so one bincount does the whole 2D histogram
+        atn_indices = np.searchsorted(atn_bins, self.symmetric_atn, side='right') - 1
+        np.clip(atn_indices, 0, self.num_attenuation_bins - 1, out=atn_indices)
+        delay_indices = np.searchsorted(delay_bins, self.delay, side='right') - 1
+        np.clip(delay_indices, 0, self.num_delay_bins - 1, out=delay_indices)
+
+        flat_indices = atn_indices
+        flat_indices *= self.num_delay_bins
+        flat_indices += delay_indices
+
+        time_frequency_weights[~attenuation_delay_premask] = 0
+        histogram = np.bincount(
+            flat_indices.ravel(), weights=time_frequency_weights.ravel(),
+            minlength=self.num_attenuation_bins * self.num_delay_bins
+        ).reshape(self.num_attenuation_bins, self.num_delay_bins)
 
         # Save non-normalized as an option for plotting later
         self.attenuation_delay_histogram = histogram
@@ -316,73 +342,53 @@ class Duet(MaskSeparationBase):
         separation.
 
         """
-        # compute masks for separation
-        best_so_far = np.inf * np.ones_like(self.stft_ch0, dtype=float)
-
-        for i in range(0, self.num_sources):
-            mask_array = np.zeros_like(self.stft_ch0, dtype=bool)
-            phase = np.exp(-1j * self.frequency_matrix * self.delay_peak[i])
-            score = np.abs(self.atn_peak[i] * phase * self.stft_ch0 - self.stft_ch1) ** 2 / (1 + self.atn_peak[i] ** 2)
-            mask = (score < best_so_far)
-            mask_array[mask] = True
-            background_mask = self.mask_type(np.array(mask_array))
-            self.result_masks.append(background_mask)
-            self.result_masks[0].mask = np.logical_xor(self.result_masks[i].mask, self.result_masks[0].mask)
-            best_so_far[mask] = score[mask]
+        # score every time-frequency point against every source's peak at once:
+        # (num_sources, n_frequency_bins, n_time_bins), in the precision of the stft.
+        # the frequency matrix is constant across time, so the phase term only
+        # needs to be evaluated once per frequency and broadcast over time
+        dtype = self.frequency_matrix.dtype
+        delay_peak = self.delay_peak.astype(dtype)[:, None, None]
+        atn_peak = self.atn_peak.astype(dtype)[:, None, None]
+        phase = np.exp(-1j * self.frequency_matrix[None] * delay_peak)
+
+        # |atn * phase * ch0 - ch1| ** 2 / (1 + atn ** 2), reusing the full-size buffers
+        residual = (atn_peak * phase) * self.stft_ch0[None]
+        residual -= self.stft_ch1[None]
+        scores = np.abs(residual)
+        del residual
+        np.square(scores, out=scores)
+        scores /= 1 + atn_peak ** 2
+
+        # a source claims a point if it beats the best score of the sources before it.
+        # The first mask is overwritten below, so only sources 1: are compared. The
+        # running best starts at inf, so 'nan' scores never become the best score
+        masks = np.empty(scores.shape, dtype=bool)
+        best_so_far = np.fmin.accumulate(scores[:-1], axis=0)
+        np.fmin(best_so_far, np.inf, out=best_so_far)
+        np.less(scores[1:], best_so_far, out=masks[1:])
 
         # Compute first mask based on what the other masks left remaining
-        self.result_masks[0].mask = np.logical_not(self.result_masks[0].mask)
+        masks[0] = np.logical_not(np.logical_xor.reduce(masks[1:], axis=0))
+        self.result_masks = [self.mask_type(mask) for mask in masks]
         return self.result_masks
 
     @staticmethod
     def _smooth_matrix(matrix, kernel):
-        """Performs two-dimensional convolution in order to smooth the values of matrix elements.
+        """Performs two-dimensional averaging in order to smooth the values of matrix elements.
 
         (similar to low-pass filtering)
 
         Parameters:
             matrix (np.array): a 2D Numpy matrix to be smoothed
-            kernel (np.array): a 2D Numpy matrix containing kernel values
+            kernel (np.array): a 1 element Numpy array containing the kernel size
         Note:
-            if Kernel is of size 1 by 1 (scalar), a Kernel by Kernel matrix of 1/Kernel**2 will be used as the matrix
-            averaging kernel
+            a Kernel by Kernel matrix of 1/Kernel**2 is used as the averaging kernel. The
+            edges of matrix are extended by repeating the outermost rows and columns. The
+            kernel is separable, so this is done with two 1D box filters.
         Output:
             smoothed_matrix (np.array): a 2D Numpy matrix containing a smoothed version of Mat (same size as Mat)
         """
+        smoothed_matrix = ndimage.uniform_filter(
+            matrix, size=int(kernel[0]), mode='nearest')
 
-        # check the dimensions of the Kernel matrix and set the values of the averaging
-        # matrix, kernel_matrix
-        kernel_matrix = np.ones((kernel[0], kernel[0])) / kernel[0] ** 2
-        krow, kcol = np.shape(kernel_matrix)
-
-        # adjust the matrix dimension for convolution
-        copy_row = int(np.floor(krow / 2))  # number of rows to copy on top and bottom
-        copy_col = int(np.floor(kcol / 2))  # number of columns to copy on either side
-
-        # TODO: This is very ugly. Make this readable.
-        # form the augmented matrix (rows and columns added to top, bottom, and sides)
-        matrix = np.mat(matrix)  # make sure Mat is a Numpy matrix
-        augmented_matrix = np.vstack(
-            [
-                np.hstack(
-                    [matrix[0, 0] * np.ones((copy_row, copy_col)),
-                     np.ones((copy_row, 1)) * matrix[0, :],
-                     matrix[0, -1] * np.ones((copy_row, copy_col))
-                     ]),
-                np.hstack(
-                    [matrix[:, 0] * np.ones((1, copy_col)),
-                     matrix,
-                     matrix[:, -1] * np.ones((1, copy_col))]),
-                np.hstack(
-                    [matrix[-1, 1] * np.ones((copy_row, copy_col)),
-                     np.ones((copy_row, 1)) * matrix[-1, :],
-                     matrix[-1, -1] * np.ones((copy_row, copy_col))
-                     ]
-                )
-            ]
-        )
-
-        # perform two-dimensional convolution between the input matrix and the kernel
-        smooted_matrix = signal.convolve2d(augmented_matrix, kernel_matrix[::-1, ::-1], mode='valid')
-
-        return smooted_matrix
+        return smoothed_matrix
@@ -1,7 +1,15 @@
+import os
+
+# each pytest-xdist worker gets its own BLAS/OpenMP pool, so limit them to one
+# thread per worker instead of oversubscribing the cores (this has to happen
+# before numpy is imported)
+if 'PYTEST_XDIST_WORKER' in os.environ:
+    for _var in ['OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS']:
+        os.environ.setdefault(_var, '1')
+
 import pytest
 from nussl import efz_utils
 import tempfile
-import os
 import musdb
 import zipfile
 import scaper
@@ -14,6 +22,11 @@ import numpy as np
 import torch
 import json
 
+if 'PYTEST_XDIST_WORKER' in os.environ:
+    # same for the scipy.fft and torch thread pools
+    nussl.constants.FFT_WORKERS = 1
+    torch.set_num_threads(1)
+
 
 def _unzip(path_to_zip, target_path):
     with zipfile.ZipFile(path_to_zip, 'r') as zip_ref:
@@ -23,8 +36,11 @@ def _unzip(path_to_zip, target_path):
 fix_dir = os.path.expanduser('~/.nussl/tests/')
 OVERWRITE_REGRESSION_DATA = False
 
+# fixtures that only return paths (or the read-only musdb index) are built
+# once per session; ones returning AudioSignals stay per module
 
-@pytest.fixture(scope="module")
+
+@pytest.fixture(scope="session")
 def benchmark_audio():
     audio_files = {}
     keys = ['K0140.wav', 'K0149.wav', 'dev1_female3_inst_mix.wav']
@@ -35,7 +51,7 @@ def benchmark_audio():
         yield audio_files
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def musdb_tracks():
     with tempfile.TemporaryDirectory() as tmp_dir:
         _dir = tmp_dir if fix_dir is None else fix_dir
@@ -43,7 +59,7 @@ def musdb_tracks():
         yield db
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def toy_datasets():
     dataset_locations = {}
     keys = ['babywsj_oW0F0H9.zip']
@@ -57,7 +73,7 @@ def toy_datasets():
         yield dataset_locations
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def mix_source_folder(toy_datasets):
     wsj_sources = toy_datasets['babywsj_oW0F0H9.zip']
     audio_files = glob.glob(
@@ -90,7 +106,7 @@ def mix_source_folder(toy_datasets):
         yield _dir
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def scaper_folder(toy_datasets):
     wsj_sources = toy_datasets['babywsj_oW0F0H9.zip']
     fg_path = os.path.join(
@@ -154,7 +170,7 @@ def drum_and_vocals(musdb_tracks):
     return item['sources']['drums'], item['sources']['vocals']
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def bad_scaper_folder(toy_datasets):
     wsj_sources = toy_datasets['babywsj_oW0F0H9.zip']
     fg_path = os.path.join(
@@ -219,23 +235,23 @@ def one_item(scaper_folder):
 @pytest.fixture(scope="module")
 def check_against_regression_data():
     def check(scores, path):
-        if not os.path.exists(path):
-            with open(path, 'w') as f:
-                json.dump(scores, f, indent=4)
-        if OVERWRITE_REGRESSION_DATA:
+        if OVERWRITE_REGRESSION_DATA or not os.path.exists(path):
+            # nothing to compare freshly written scores against
             with open(path, 'w') as f:
                 json.dump(scores, f, indent=4)
-        else:
-            with open(path, 'r') as f:
-                reg_scores = json.load(f)
-            for key in scores:
-                if key not in ['permutation', 'combination']:
-                    for metric in scores[key]:
-                        if metric in reg_scores[key]:
-                            assert np.allclose(
-                                scores[key][metric],
-                                reg_scores[key][metric],
-                                atol=1e-1
-                            )
+            return
+
+        with open(path, 'r') as f:
+            reg_scores = json.load(f)
+        for key in scores:
+            if key not in ['permutation', 'combination']:
+                for metric in scores[key]:
+                    if metric in reg_scores[key]:
+                        np.testing.assert_allclose(
+                            scores[key][metric],
+                            reg_scores[key][metric],
+                            rtol=1e-5, atol=1e-1, equal_nan=False,
+                            err_msg=f'{path}: {key}/{metric}'
+                        )
     return check
 
@@ -145,6 +145,36 @@ def test_load_audio_from_file(benchmark_audio):
     a.load_audio_from_file(path, offset=offset, duration=duration)
 
 
+def test_load_audio_from_file_fallback(monkeypatch):
+    # files libsndfile can't open go through audioread / librosa.load instead,
+    # which should give the same audio as the soundfile path
+    rng = np.random.RandomState(0)
+    data = rng.uniform(-.5, .5, size=(2, 2 * sr))
+
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=True) as f:
+        nussl.AudioSignal(
+            audio_data_array=data, sample_rate=sr).write_audio_to_file(f.name)
+
+        cases = [{}, {'offset': .5}, {'offset': .25, 'duration': 1.0}]
+        expected = [nussl.AudioSignal(f.name, **kwargs) for kwargs in cases]
+
+        soundfile = nussl.core.audio_signal.sf
+
+        class _NoSoundFile(soundfile.SoundFile):
+            def __init__(self, *args, **kwargs):
+                raise RuntimeError('Error opening file')
+
+        monkeypatch.setattr(soundfile, 'SoundFile', _NoSoundFile)
+
+        for kwargs, ref in zip(cases, expected):
+            a = nussl.AudioSignal(f.name, **kwargs)
+            assert a.sample_rate == ref.sample_rate
+            assert a.audio_data.dtype == ref.audio_data.dtype == np.float32
+            assert np.array_equal(a.audio_data, ref.audio_data)
+
+        pytest.raises(AudioSignalException, nussl.AudioSignal, f.name, offset=3.0)
+
+
 def test_write_to_file(benchmark_audio):
     for key, path in benchmark_audio.items():
         with tempfile.NamedTemporaryFile(suffix='.wav', delete=True) as f:
@@ -159,6 +189,22 @@ def test_write_to_file(benchmark_audio):
             assert (a.sample_rate == b.sample_rate)
 
 
+def test_write_to_file_round_trip():
+    # 16-bit samples survive a write and read exactly, and full scale clips
+    # instead of wrapping around
+    grid = np.arange(-2 ** 15, 2 ** 15) / 2 ** 15
+    data = np.concatenate([grid, [1.0, 1.5, -1.5]])
+
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=True) as f:
+        nussl.AudioSignal(
+            audio_data_array=data, sample_rate=sr).write_audio_to_file(f.name)
+        a = nussl.AudioSignal(f.name)
+
+    assert np.array_equal(a.audio_data[0, :grid.size], grid)
+    assert np.array_equal(
+        a.audio_data[0, grid.size:], [1 - 2 ** -15, 1 - 2 ** -15, -1])
+
+
 def test_write_array_to_file(benchmark_audio):
     for key, path in benchmark_audio.items():
         with tempfile.NamedTemporaryFile(suffix='.wav', delete=True) as f:
@@ -360,6 +406,14 @@ def _get_channel_helper(signal, n_channels):
         i += 1
     assert i == a.num_channels
 
+    # the channel index is checked before whether there is any stft data
+    for getter in [a.get_power_spectrogram_channel,
+                   a.get_magnitude_spectrogram_channel]:
+        with pytest.raises(AudioSignalException, match='Cannot get channel'):
+            getter(n_channels)
+        with pytest.raises(AudioSignalException, match='stft_data is None'):
+            getter(0)
+
 
 def test_active_region(benchmark_audio):
     a = nussl.AudioSignal(benchmark_audio['K0140.wav'])
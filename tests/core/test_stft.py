@@ -38,8 +38,11 @@ signals = []
 combos = itertools.product(win_lengths, hop_length_ratios, window_types)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def signals(benchmark_audio):
+    # decoded once for the whole module (test_stft_istft_combo alone uses it
+    # a few hundred times); the arrays are made read-only so that no test can
+    # change them for the ones after it
     signals_ = []
     # noisy signal
     noise = (np.random.rand(n_ch, length) * 2) - 1
@@ -54,6 +57,9 @@ def signals(benchmark_audio):
         _s = nussl.AudioSignal(path, duration=dur)
         signals_.append(_s.audio_data)
 
+    for _s in signals_:
+        _s.setflags(write=False)
+
     yield signals_
 
 
@@ -3,6 +3,7 @@ import numpy as np
 from nussl.separation.base import MaskSeparationBase, SeparationBase
 from nussl.core.masks import BinaryMask, SoftMask, MaskBase
 import pytest
+import warnings
 
 import torch
 import random
@@ -80,9 +81,71 @@ def test_utils_find_peak_indices():
     pytest.warns(
         UserWarning, nussl.utils.find_peak_indices, array, 1000, threshold=1.0)
 
+    # for 2D input the warning counts nonzero coordinates, two per point
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        nussl.utils.find_peak_indices(array, 2, threshold=1.0)
+    pytest.warns(
+        UserWarning, nussl.utils.find_peak_indices, array, 3, threshold=1.0)
+
     pytest.raises(
         ValueError, nussl.utils.find_peak_indices, np.ones((10, 10, 10)), 3, min_dist=0)
 
+    # the maximum scales to exactly 1.0, so it survives threshold=1.0
+    peak = nussl.utils.find_peak_indices(np.array([0, 1, 49, 3]), 1, threshold=1.0)
+    assert peak == [2]
+
+    # neighbours of a 2D peak are skipped
+    array = np.zeros((6, 6))
+    array[1, 1], array[1, 2], array[4, 3] = 3, 2, 1
+    peak = nussl.utils.find_peak_indices(array, 3, min_dist=1, threshold=.1)
+    assert peak == [[1, 1], [4, 3]]
+
+    # with do_min, the minima below -threshold are found and the thrown out
+    # values are never returned
+    array = np.array([5, 0, 5, 5, 1, 5])
+    peak = nussl.utils.find_peak_indices(
+        array, 2, min_dist=0, do_min=True, threshold=-.5)
+    assert peak == [1, 4]
+
+    array = np.full((6, 6), 5.)
+    array[1, 1], array[1, 2], array[4, 3] = 0, .5, 1
+    peak = nussl.utils.find_peak_indices(
+        array, 3, min_dist=1, do_min=True, threshold=-.5)
+    assert peak == [[1, 1], [4, 3]]
+
+    pytest.raises(
+        ValueError, nussl.utils.find_peak_indices, array, 3, do_min=True)
+
+
+def test_utils_find_peak_indices_per_row(monkeypatch):
+    rng = np.random.RandomState(0)
+    array = rng.rand(20, 30)
+    array[3, ::4] = array[3].max()  # ties
+
+    # force several blocks of rows
+    monkeypatch.setattr(nussl.utils, '_PEAK_ROWS_BLOCK_ELEMENTS', 70)
+    for min_dist, threshold in [(0, 0), (2, .5), (2.5, .2)]:
+        peaks = nussl.utils._find_peak_indices_per_row(
+            array, 5, min_dist=min_dist, threshold=threshold)
+        assert peaks == [
+            nussl.utils.find_peak_indices(row, 5, min_dist=min_dist, threshold=threshold)
+            for row in array
+        ]
+
+    peaks = nussl.utils._find_peak_indices_per_row(
+        array, 5, min_dist=2, do_min=True, threshold=-.2)
+    assert peaks == [
+        nussl.utils.find_peak_indices(row, 5, min_dist=2, do_min=True, threshold=-.2)
+        for row in array
+    ]
+
+    pytest.raises(
+        ValueError, nussl.utils._find_peak_indices_per_row, array, 5, threshold=1.1)
+
+    pytest.warns(
+        UserWarning, nussl.utils._find_peak_indices_per_row, array, 5, threshold=1.0)
+
 
 def test_utils_complex_randn():
     mat = nussl.utils.complex_randn((100, 100))
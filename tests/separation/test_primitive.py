@@ -110,6 +110,13 @@ def test_repet(
         primitive.Repet.find_repeating_period_simple,
         np.random.rand(100), 101, 5)
 
+    # beat spectrum is available before run and cached afterwards
+    repet = primitive.Repet(mix)
+    beat_spectrum = repet.get_beat_spectrum()
+    assert repet.get_beat_spectrum() is beat_spectrum
+    repet.audio_signal = mix
+    assert repet.beat_spectrum is None
+
     config = [
         ({}, 'defaults'),
         ({'mask_type': 'binary'}, 'binary'),
@@ -172,6 +179,46 @@ def test_melodia(
             REGRESSION_PATH, f'melodia_{name}.json')
         check_against_regression_data(scores, reg_path)
 
+
+def test_repet_cache_attributes_without_data():
+    # the cached spectrograms exist (as None) even if there is no audio to
+    # compute them from yet
+    with pytest.warns(UserWarning):
+        repet = primitive.Repet(nussl.AudioSignal(), period=1)
+    assert repet.magnitude_spectrogram is None
+    assert repet.beat_spectrum is None
+
+    with pytest.warns(UserWarning):
+        repet_sim = primitive.RepetSim(nussl.AudioSignal())
+    assert repet_sim.magnitude_spectrogram is None
+    assert repet_sim.similarity_matrix is None
+
+
+def test_repet_sim_run_after_get_similarity_matrix():
+    # run() on an instance whose similarity matrix is cached must find the same
+    # masks as a fresh instance, which computes the similarity rows on the fly
+    sr = 8000
+    t = np.arange(3 * sr) / sr
+    rng = np.random.RandomState(0)
+    beat = np.sin(2 * np.pi * 220 * t) * (np.mod(t, .5) < .1)
+    mix = nussl.AudioSignal(
+        audio_data_array=np.stack([beat + .3 * rng.randn(t.size), beat]),
+        sample_rate=sr)
+
+    cached = primitive.RepetSim(mix)
+    cached.get_similarity_matrix()
+    assert cached.similarity_matrix is not None
+    cached_masks = cached.run()
+
+    fresh = primitive.RepetSim(mix)
+    fresh_masks = fresh.run()
+    assert fresh.similarity_matrix is None
+
+    assert cached.similarity_indices == fresh.similarity_indices
+    for c, f in zip(cached_masks, fresh_masks):
+        assert np.array_equal(c.mask, f.mask)
+
+
 def test_repet_sim(
     music_mix_and_sources, 
     check_against_regression_data
@@ -181,6 +228,13 @@ def test_repet_sim(
     vox = copy.deepcopy(sources['vocals'])
     acc = copy.deepcopy(sources['drums+bass+other'])
 
+    # similarity matrix is available before run and cached afterwards
+    repet_sim = primitive.RepetSim(mix)
+    similarity_matrix = repet_sim.get_similarity_matrix()
+    assert repet_sim.get_similarity_matrix() is similarity_matrix
+    repet_sim.audio_signal = mix
+    assert repet_sim.similarity_matrix is None
+
     config = [
         ({}, 'defaults'),
         ({'mask_type': 'binary'}, 'binary'),
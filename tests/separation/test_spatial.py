@@ -1,6 +1,7 @@
 import pytest
 import nussl
 from nussl.separation import SeparationException
+from nussl.core.audio_signal import AudioSignalException
 import numpy as np
 import os
 
@@ -8,34 +9,53 @@ REGRESSION_PATH = 'tests/separation/regression/spatial/'
 os.makedirs(REGRESSION_PATH, exist_ok=True)
 
 
+def _random_delay(signal, max_delay):
+    delays = [np.random.randint(1, max_delay) for _ in range(signal.num_channels)]
+    return nussl.mixing.delay_audio_signal(signal, delays)
+
+
+def _pan_and_delay(sources, pans, max_delay):
+    return [
+        _random_delay(nussl.mixing.pan_audio_signal(s, p), max_delay)
+        for s, p in zip(sources, pans)
+    ]
+
+
+def _check_estimates(sources, estimates, reg_name,
+                     check_against_regression_data, **kwargs):
+    evaluator = nussl.evaluation.BSSEvalScale(
+        sources, estimates, compute_permutation=True, **kwargs)
+    scores = evaluator.evaluate()
+
+    reg_path = os.path.join(REGRESSION_PATH, reg_name)
+    check_against_regression_data(scores, reg_path)
+
+
+def _check_mono_estimates(sources, estimates, reg_name,
+                          check_against_regression_data):
+    for e in estimates:
+        e.to_mono()
+    for s in sources:
+        s.to_mono()
+
+    _check_estimates(sources, estimates, reg_name, check_against_regression_data,
+                     source_labels=['s1', 's2'])
+
+
 def test_spatial_clustering(mix_and_sources, check_against_regression_data):
     nussl.utils.seed(0)
     mix, sources = mix_and_sources
     sources = list(sources.values())
 
-    a = nussl.mixing.pan_audio_signal(sources[0], -35)
-    a_delays = [np.random.randint(1, 200) for _ in range(a.num_channels)]
-    a = nussl.mixing.delay_audio_signal(a, a_delays)
-
-    b = nussl.mixing.pan_audio_signal(sources[1], 15)
-    b_delays = [np.random.randint(1, 200) for _ in range(b.num_channels)]
-    b = nussl.mixing.delay_audio_signal(b, b_delays)
+    a, b = _pan_and_delay(sources[:2], [-35, 15], 200)
 
     mix = a + b
     spcl = nussl.separation.spatial.SpatialClustering(mix, num_sources=2)
     estimates = spcl()
-    for e in estimates:
-        e.to_mono()
-    for s in [a, b]:
-        s.to_mono()
 
-    evaluator = nussl.evaluation.BSSEvalScale(
-        [a, b], estimates, compute_permutation=True, 
-        source_labels=['s1', 's2'])
-    scores = evaluator.evaluate()
-
-    reg_path = os.path.join(REGRESSION_PATH, 'spatial_clustering.json')
-    check_against_regression_data(scores, reg_path)
+    _check_mono_estimates(
+        [a, b], estimates, 'spatial_clustering.json',
+        check_against_regression_data)
 
 
 def test_duet(mix_and_sources, check_against_regression_data):
@@ -43,31 +63,68 @@ def test_duet(mix_and_sources, check_against_regression_data):
     mix, sources = mix_and_sources
     sources = list(sources.values())
 
-    a = nussl.mixing.pan_audio_signal(sources[0], -35)
-    a_delays = [np.random.randint(1, 20) for _ in range(a.num_channels)]
-    a = nussl.mixing.delay_audio_signal(a, a_delays)
-
-    b = nussl.mixing.pan_audio_signal(sources[1], 35)
-    b_delays = [np.random.randint(1, 20) for _ in range(b.num_channels)]
-    b = nussl.mixing.delay_audio_signal(b, b_delays)
+    a, b = _pan_and_delay(sources[:2], [-35, 35], 20)
 
     mix = a + b
     duet = nussl.separation.spatial.Duet(mix, num_sources=2)
     estimates = duet()
 
-    for e in estimates:
-        e.to_mono()
+    _check_mono_estimates(
+        [a, b], estimates, 'duet.json', check_against_regression_data)
 
-    for s in [a, b]:
-        s.to_mono()
 
-    evaluator = nussl.evaluation.BSSEvalScale(
-        [a, b], estimates, compute_permutation=True,
-        source_labels=['s1', 's2'])
-    scores = evaluator.evaluate()
+def _synthetic_stereo_mix(seed):
+    rng = np.random.RandomState(seed)
+    sources = [
+        nussl.AudioSignal(audio_data_array=rng.randn(8000), sample_rate=8000)
+        for _ in range(2)
+    ]
+    np.random.seed(seed)
+    a, b = _pan_and_delay(sources, [-35, 35], 5)
+    return a + b
 
-    reg_path = os.path.join(REGRESSION_PATH, 'duet.json')
-    check_against_regression_data(scores, reg_path)
+
+def test_duet_reuse_matches_fresh():
+    # cheap synthetic check that re-running one Duet on a new mixture gives the
+    # same result as a fresh instance, i.e. no state leaks between runs
+    first_mix, second_mix = _synthetic_stereo_mix(0), _synthetic_stereo_mix(1)
+
+    duet = nussl.separation.spatial.Duet(first_mix, num_sources=2)
+    duet()
+    first_histogram = duet.normalized_attenuation_delay_histogram
+
+    duet.audio_signal = second_mix
+    reused = duet()
+
+    fresh_duet = nussl.separation.spatial.Duet(second_mix, num_sources=2)
+    fresh = fresh_duet()
+
+    assert duet.normalized_attenuation_delay_histogram is not first_histogram
+    assert np.array_equal(duet.normalized_attenuation_delay_histogram,
+                          fresh_duet.normalized_attenuation_delay_histogram)
+    assert np.array_equal(duet.peak_indices, fresh_duet.peak_indices)
+    for r, f in zip(reused, fresh):
+        assert np.array_equal(r.audio_data, f.audio_data)
+
+
+def test_duet_mono_input():
+    mono = nussl.AudioSignal(audio_data_array=np.random.rand(8000), sample_rate=8000)
+    duet = nussl.separation.spatial.Duet(mono, num_sources=2)
+    with pytest.raises(AudioSignalException, match='Cannot get channel 1'):
+        duet.run()
+
+
+def test_duet_masks_nan_scores():
+    # a 'nan' score never counts as the best one, so when the first source
+    # scores 'nan' everywhere the second one claims every point
+    duet = nussl.separation.spatial.Duet(_synthetic_stereo_mix(0), num_sources=2)
+    duet.run()
+    duet.atn_peak = duet.atn_peak.astype(float)
+    duet.atn_peak[0] = np.nan
+
+    masks = duet._compute_masks()
+    assert not masks[0].mask.any()
+    assert masks[1].mask.all()
 
 
 def test_projet(
@@ -85,30 +142,22 @@ def test_projet(
     sep = nussl.separation.spatial.Projet(mix, 2)
     estimates = sep()
 
-    evaluator = nussl.evaluation.BSSEvalScale(
-        [drum, vocals], estimates, compute_permutation=True)
-    scores = evaluator.evaluate()
-
-    reg_path = os.path.join(REGRESSION_PATH, 'projet_pan.json')
-    check_against_regression_data(scores, reg_path)
+    _check_estimates(
+        [drum, vocals], estimates, 'projet_pan.json',
+        check_against_regression_data)
 
     # now put some delays
-    delays = [np.random.randint(1, 20) for _ in range(drum.num_channels)]
-    drum = nussl.mixing.delay_audio_signal(drum, delays)
-    delays = [np.random.randint(1, 20) for _ in range(vocals.num_channels)]
-    vocals = nussl.mixing.delay_audio_signal(vocals, delays)
+    drum = _random_delay(drum, 20)
+    vocals = _random_delay(vocals, 20)
 
     mix = drum + vocals
 
     sep = nussl.separation.spatial.Projet(mix, 2)
     estimates = sep()
 
-    evaluator = nussl.evaluation.BSSEvalScale(
-        [drum, vocals], estimates, compute_permutation=True)
-    scores = evaluator.evaluate()
-
-    reg_path = os.path.join(REGRESSION_PATH, 'projet_delay.json')
-    check_against_regression_data(scores, reg_path)
+    _check_estimates(
+        [drum, vocals], estimates, 'projet_delay.json',
+        check_against_regression_data)
 
     # now do some initialization of the PSDs
 
@@ -121,9 +170,6 @@ def test_projet(
     sep = nussl.separation.spatial.Projet(mix, 2, estimates=ft2d_estimates)
     estimates = sep()
 
-    evaluator = nussl.evaluation.BSSEvalScale(
-        [drum, vocals], estimates, compute_permutation=True)
-    scores = evaluator.evaluate()
-
-    reg_path = os.path.join(REGRESSION_PATH, 'projet_with_init.json')
-    check_against_regression_data(scores, reg_path)
+    _check_estimates(
+        [drum, vocals], estimates, 'projet_with_init.json',
+        check_against_regression_data)